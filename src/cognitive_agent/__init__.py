@@ -1,4 +1,4 @@
-from .agent import CognitiveAgent
+from .agent import CognitiveAgent, pure_tool
 
 __version__ = "0.1.0"
-__all__ = ["CognitiveAgent"]
\ No newline at end of file
+__all__ = ["CognitiveAgent", "pure_tool"]
\ No newline at end of file
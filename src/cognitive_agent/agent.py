@@ -8,16 +8,80 @@ Features:
 - Streaming "thinking" capture (model_thinking)
 - Agent-level thinking, decisions, meta-reflection, error analysis
 - Dynamic tool routing (tool registry with metadata)
+- Memoized dispatch for tools marked with @pure_tool
 - Simple knowledge graph extraction & storage
 - Token usage aggregation and timing metrics
+- LRU response cache in front of model calls
+- Independent action steps dispatched concurrently (max_workers > 1) or as one .batch() request
+- Optional semantic (embedding-similarity) cache for plan/reflect prompts
 - Plugin hooks for planner/validator/synthesizer
 - stream_response boolean (init or run-time) and optional callback
+- Async event stream (`async for event in agent.events(objective)`)
 """
 
+import asyncio
+import functools
+import hashlib
 import json
+import os
 import re
+import sys
+import threading
 import time
-from typing import List, Callable, Any, Dict, Optional
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Callable, Any, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the semantic cache
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SENT_RE = re.compile(r"[^.?!]+")
+_WORD_RE = re.compile(r"\S+")
+_SVO_RE = re.compile(r"\b(\w+)\s+(?:the\s+)?([A-Z][a-zA-Z]+)")
+
+if orjson is not None:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep catching the latter
+    _loads = orjson.loads
+    _dumps_bytes = orjson.dumps
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+else:
+    _loads = json.loads
+    _dumps = json.dumps
+
+    def _dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+_USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def _argmax_cos(embeddings, query):
+    # rows and query are L2-normalised float32, so one sgemv gives every cosine
+    sims = embeddings @ query
+    best = int(np.argmax(sims))
+    return best, float(sims[best])
+
+
+# ---------------------------
+# Tool helpers
+# ---------------------------
+def pure_tool(fn: Callable) -> Callable:
+    """
+    Marks a tool as deterministic and side-effect free.
+    CognitiveAgent memoizes such tools, so repeated identical inputs skip re-execution.
+    """
+    fn._pure = True
+    return fn
 
 
 # ---------------------------
@@ -25,54 +89,124 @@ from typing import List, Callable, Any, Dict, Optional
 # ---------------------------
 class KnowledgeGraph:
     def __init__(self):
-        self.nodes = set()
+        # node -> occurrence count; names are interned so repeated nodes and
+        # edge tuples share a single string object
+        self.nodes: Dict[str, int] = {}
         self.edges = []
+        # concurrent runs on one agent (e.g. overlapping events() streams) share the graph
+        self._lock = threading.Lock()
+
+    def _add_node(self, name: str) -> str:
+        name = sys.intern(name)
+        self.nodes[name] = self.nodes.get(name, 0) + 1
+        return name
 
     def add_text(self, text: str):
         """
         Very naive subject-verb-object extraction.
         Example: "AI uses Data and improves Performance."
         """
-        sentences = re.split(r"[.?!]", text)
-        for sentence in sentences:
-            words = sentence.strip().split()
-            if not words:
-                continue
-
-            # Extract subject (first capitalized word)
-            subject = None
-            if words[0][0].isupper():
-                subject = words[0]
-                self.nodes.add(subject)
-
-            # Extract verb-object pairs
-            pairs = re.findall(r"\b(\w+)\s+(?:the\s+)?([A-Z][a-zA-Z]+)", sentence)
-            for verb, obj in pairs:
-                if subject:
-                    self.edges.append((subject, verb, obj))
-                    self.nodes.add(obj)
-                else:
-                    self.nodes.add(obj)
+        with self._lock:
+            # Single pass over `text`: each sentence is scanned in place via
+            # pos/endpos instead of being split out into its own string.
+            for sentence in _SENT_RE.finditer(text):
+                start, end = sentence.span()
+                first_word = _WORD_RE.search(text, start, end)
+                if first_word is None:
+                    continue
+
+                # Extract subject (first capitalized word); ASCII range check,
+                # consistent with the [A-Z] object pattern
+                subject = None
+                word = first_word.group()
+                if "A" <= word[0] <= "Z":
+                    subject = self._add_node(word)
+
+                # Extract verb-object pairs
+                pairs = _SVO_RE.findall(text, start, end)
+                for verb, obj in pairs:
+                    obj = self._add_node(obj)
+                    if subject:
+                        self.edges.append((subject, sys.intern(verb), obj))
 
     def summary(self):
-        return {"nodes": list(self.nodes), "edges": self.edges}
+        with self._lock:
+            return {"nodes": list(self.nodes), "edges": list(self.edges)}
 
 
 # ---------------------------
 # Simple Memory System
 # ---------------------------
+def _close_store(buf: bytearray, fh):
+    """Writes out pending entries and closes the store; runs on GC or at interpreter exit."""
+    if buf:
+        fh.write(buf)
+        buf.clear()
+    fh.close()
+
+
 class Memory:
-    def __init__(self, path: Optional[str] = None):
-        self.short_term = []
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        buffer_limit: int = 64 * 1024,
+        fsync: bool = False,
+        short_term_size: int = 64,
+    ):
+        # bounded ring buffer: oldest messages are evicted once full
+        self.short_term = deque(maxlen=short_term_size)
         self.long_term = []
         self.path = path
+        # Group commit: serialized entries accumulate in memory and are written
+        # once buffer_limit bytes are pending (0 = write every entry), or on
+        # flush()/sync()/close(). fsync=True also fsyncs on every write-out.
+        self.buffer_limit = buffer_limit
+        self.fsync = fsync
+        self._buf = bytearray()
+        self._fh = None
+        self._finalizer = None
+        if path:
+            self._open()
+
+    def _open(self):
+        # Opened eagerly so the exit-time flush never needs builtins like open()
+        # that may already be torn down during interpreter shutdown.
+        self._fh = open(self.path, "ab")
+        self._finalizer = weakref.finalize(self, _close_store, self._buf, self._fh)
 
     def persist_long(self, text: str):
         entry = {"text": text, "timestamp": time.time()}
         self.long_term.append(entry)
         if self.path:
-            with open(self.path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(entry) + "\n")
+            self._buf += _dumps_bytes(entry)
+            self._buf += b"\n"
+            if len(self._buf) >= self.buffer_limit:
+                self.flush()
+
+    def flush(self):
+        """Writes pending long-term entries to the store file."""
+        if not self._buf:
+            return
+        if self._fh is None:
+            self._open()
+        self._fh.write(self._buf)
+        self._fh.flush()
+        self._buf.clear()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    def sync(self):
+        """Writes pending entries and forces them to disk regardless of `fsync`."""
+        self.flush()
+        if self._fh is not None:
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        self.flush()
+        if self._finalizer is not None:
+            self._finalizer()
+        self._fh = None
+        self._finalizer = None
 
     def recall_long(self, n: int = 1):
         return self.long_term[-n:]
@@ -81,7 +215,180 @@ class Memory:
         self.short_term.append({"role": role, "content": content})
 
     def get_context(self):
-        return self.short_term[-5:]
+        return list(islice(self.short_term, max(0, len(self.short_term) - 5), None))
+
+
+# ---------------------------
+# Simple Response Cache
+# ---------------------------
+class ResponseCache:
+    """
+    Thread-safe LRU cache of model responses keyed by a hash of the messages.
+    Entries older than `ttl` seconds (if set) are treated as misses.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(messages: List[Dict[str, str]]) -> bytes:
+        return hashlib.blake2b(json.dumps(messages, sort_keys=True).encode()).digest()
+
+    def get(self, key: bytes) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, response = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: bytes, response: Dict):
+        with self._lock:
+            self._entries[key] = (time.time(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ---------------------------
+# Semantic Cache
+# ---------------------------
+class SemanticCache:
+    """
+    Embedding-similarity cache: returns a stored response when the cosine
+    similarity between the query text and a previously cached text exceeds
+    `threshold`. Entries are grouped by namespace (e.g. "plan", "reflect")
+    so different stages never answer for each other.
+    Requires numpy.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], Any],
+        threshold: float = 0.92,
+        ttl: Optional[float] = 3600,
+        max_entries: int = 1024,
+    ):
+        if np is None:
+            raise ImportError("SemanticCache requires numpy: pip install cognitive-agent[semantic]")
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._buckets: Dict[str, Dict[str, Any]] = {}
+        self._last_embedding = (None, None)
+        # Guards bucket contents; embed_fn runs outside the lock since it may be slow.
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str):
+        # lookup() and add() usually see the same text back to back
+        last_text, last_vec = self._last_embedding
+        if text == last_text:
+            return last_vec
+        vec = np.asarray(self.embed_fn(text), dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        if norm:
+            vec = vec / norm
+        self._last_embedding = (text, vec)
+        return vec
+
+    def _evict(self, bucket: Dict[str, Any]):
+        keep = len(bucket["responses"])
+        if self.ttl is not None:
+            cutoff = time.time() - self.ttl
+            keep = sum(1 for ts in bucket["timestamps"] if ts >= cutoff)
+        keep = min(keep, self.max_entries)
+        drop = len(bucket["responses"]) - keep
+        if drop > 0:
+            bucket["embeddings"] = bucket["embeddings"][drop:]
+            del bucket["responses"][:drop]
+            del bucket["timestamps"][:drop]
+
+    def lookup(self, text: str, namespace: str = "default") -> Optional[Dict]:
+        if not self._buckets.get(namespace):
+            return None
+        query = self._embed(text)
+
+        with self._lock:
+            bucket = self._buckets.get(namespace)
+            if not bucket:
+                return None
+            self._evict(bucket)
+            if not bucket["responses"]:
+                return None
+            if query.shape[0] != bucket["embeddings"].shape[1]:
+                # embed_fn changed dimension; nothing stored is comparable
+                return None
+            best, score = _argmax_cos(bucket["embeddings"], query)
+            if score > self.threshold:
+                return bucket["responses"][int(best)]
+        return None
+
+    def add(self, text: str, response: Dict, namespace: str = "default"):
+        vec = self._embed(text)
+        with self._lock:
+            bucket = self._buckets.get(namespace)
+            if bucket is None or bucket["embeddings"].shape[1] != vec.shape[0]:
+                bucket = {
+                    "embeddings": np.empty((0, vec.shape[0]), dtype=np.float32),
+                    "responses": [],
+                    "timestamps": [],
+                }
+                self._buckets[namespace] = bucket
+            bucket["embeddings"] = np.vstack([bucket["embeddings"], vec[None, :]])
+            bucket["responses"].append(response)
+            bucket["timestamps"].append(time.time())
+            self._evict(bucket)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._last_embedding = (None, None)
+
+
+# ---------------------------
+# Trace Records
+# ---------------------------
+_UNSET = object()
+
+
+class TraceEntry:
+    """
+    Slotted trace record used while a run is in progress.
+    as_dict() yields the public trace dict, leaving out fields that were never set.
+    """
+
+    __slots__ = ("role", "stage", "content", "name", "response", "meta_reflection")
+
+    def __init__(self, role, stage=_UNSET, content=_UNSET, name=_UNSET, response=_UNSET, meta_reflection=_UNSET):
+        self.role = role
+        self.stage = stage
+        self.content = content
+        self.name = name
+        self.response = response
+        self.meta_reflection = meta_reflection
+
+    def as_dict(self) -> Dict[str, Any]:
+        entry = {}
+        for field in self.__slots__:
+            value = getattr(self, field)
+            if value is not _UNSET:
+                entry[field] = value
+        return entry
 
 
 # ---------------------------
@@ -94,12 +401,28 @@ class CognitiveAgent:
         tools: Optional[List[Callable]] = None,
         memory_store_path: Optional[str] = None,
         stream_response: bool = False,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = None,
+        embed_fn: Optional[Callable[[str], Any]] = None,
+        semantic_threshold: float = 0.92,
+        semantic_ttl: Optional[float] = 3600,
+        max_workers: int = 1,
+        memory_buffer_limit: int = 64 * 1024,
+        memory_fsync: bool = False,
     ):
         self.model = model
         self.stream_response = stream_response
-        self.memory = Memory(memory_store_path)
+        self.max_workers = max_workers
+        self.memory = Memory(memory_store_path, buffer_limit=memory_buffer_limit, fsync=memory_fsync)
         self.kg = KnowledgeGraph()
-        self.tools = {t.__name__: t for t in (tools or [])}
+        self.tools = {
+            t.__name__: functools.lru_cache(maxsize=256)(t) if getattr(t, "_pure", False) else t
+            for t in (tools or [])
+        }
+        self.cache = ResponseCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.semantic_cache = (
+            SemanticCache(embed_fn, threshold=semantic_threshold, ttl=semantic_ttl) if embed_fn else None
+        )
 
     # ---- model invocation wrapper ----
     def _invoke_model(self, messages: List[Dict[str, str]]) -> Dict:
@@ -118,69 +441,209 @@ class CognitiveAgent:
         else:
             raise TypeError(f"Model {self.model} is not callable and has no invoke/chat method.")
 
+    def _cached_invoke(self, messages: List[Dict[str, str]]) -> Tuple[Dict, bool]:
+        """
+        Exact-match cache in front of _invoke_model.
+        Returns (response, cached) so callers don't bill cache hits as token usage.
+        Bypassed while streaming so every step still hits the model.
+        Only responses carrying usage data are stored.
+        """
+        if self.cache is None or self.stream_response:
+            return self._invoke_model(messages), False
+
+        key = ResponseCache.make_key(messages)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        response = self._invoke_model(messages)
+        if response.get("usage"):
+            self.cache.put(key, response)
+        return response, False
+
+    def _semantic_invoke(self, namespace: str, text: str, messages: List[Dict[str, str]]) -> Tuple[Dict, bool]:
+        """
+        Semantic cache keyed on `text` (the objective) in front of _cached_invoke.
+        Used for the planning and reflection stages only.
+        """
+        if self.semantic_cache is None or self.stream_response:
+            return self._cached_invoke(messages)
+
+        cached = self.semantic_cache.lookup(text, namespace)
+        if cached is not None:
+            return cached, True
+
+        response, hit = self._cached_invoke(messages)
+        if response.get("usage"):
+            self.semantic_cache.add(text, response, namespace)
+        return response, hit
+
+    def _invoke_many(self, batch: List[List[Dict[str, str]]]) -> List[Tuple[Dict, bool]]:
+        """
+        Invokes the model once per message list and returns (response, cached)
+        pairs in input order:
+        - a single .batch() request when the model supports it (not while streaming)
+        - otherwise one call per message list, concurrently when max_workers > 1
+        """
+        if hasattr(self.model, "batch") and not self.stream_response:
+            return self._batch_invoke(batch)
+        if self.max_workers <= 1 or len(batch) <= 1:
+            return [self._cached_invoke(messages) for messages in batch]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batch))) as pool:
+            return list(pool.map(self._cached_invoke, batch))
+
+    def _invoke_serial(self, steps: List[str], batch: List[List[Dict[str, str]]], stream_callback):
+        """
+        Lazily invokes one step at a time, emitting its thinking event first, so the
+        caller finishes processing each step before the next one starts.
+        """
+        for step, messages in zip(steps, batch):
+            if self.stream_response:
+                self.emit_stream_event(stream_callback, "model_thinking", f"Thinking about step: {step}")
+            yield self._cached_invoke(messages)
+
+    def _batch_invoke(self, batch: List[List[Dict[str, str]]]) -> List[Tuple[Dict, bool]]:
+        """Sends every message list that isn't already cached in one model.batch() request."""
+        if not batch:
+            return []
+        if self.cache is None:
+            return [(response, False) for response in self._checked_batch(batch)]
+
+        keys = [ResponseCache.make_key(messages) for messages in batch]
+        cached = [self.cache.get(key) for key in keys]
+        results = [(response, True) for response in cached]
+        misses = [i for i, response in enumerate(cached) if response is None]
+        if misses:
+            fresh = self._checked_batch([batch[i] for i in misses])
+            for i, response in zip(misses, fresh):
+                results[i] = (response, False)
+                if response.get("usage"):
+                    self.cache.put(keys[i], response)
+        return results
+
+    def _checked_batch(self, batch: List[List[Dict[str, str]]]) -> List[Dict]:
+        responses = list(self.model.batch(batch))
+        if len(responses) != len(batch):
+            raise ValueError(
+                f"Model {self.model} returned {len(responses)} responses from batch() for {len(batch)} prompts."
+            )
+        return responses
+
     # ---- utility to emit events for streaming ----
     def emit_stream_event(self, stream_callback, event_type, data):
         if stream_callback:
             stream_callback({"type": event_type, "data": data})
 
+    async def events(self, objective: str):
+        """
+        Runs `objective` in a worker thread and yields stream events as they
+        are produced, so the agent never blocks on the consumer.
+        Step events require stream_response; the last event is
+        {"type": "result", "data": <run() output>}.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        # Each call gets its own queue, fed from the worker thread through run()'s callback
+        def forward(event):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        future = loop.run_in_executor(None, functools.partial(self.run, objective, forward))
+        future.add_done_callback(lambda _: queue.put_nowait(done))
+        while True:
+            event = await queue.get()
+            if event is done:
+                break
+            yield event
+        yield {"type": "result", "data": await future}
+
+    # ---- plan parsing ----
+    def _parse_plan(self, plan_text: str) -> Dict:
+        """
+        Decodes the planner's JSON object, falling back to a single-step plan.
+        Content that can't be a JSON object (prose, lists) skips the decode entirely.
+        """
+        if plan_text.lstrip().startswith("{"):
+            try:
+                plan = _loads(plan_text)
+            except json.JSONDecodeError:
+                plan = None
+            if isinstance(plan, dict):
+                return plan
+        return {"steps": ["Perform the task directly"], "rationale": "Fallback simple plan."}
+
     # ---- core execution ----
     def run(self, objective: str, stream_callback: Optional[Callable] = None):
         start_time = time.time()
-        trace = []
-        usage = {"steps": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        usage = {"steps": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_hits": 0}
 
         # 1️⃣ Planning stage
         plan_prompt = f"Planner: Create a step-by-step plan to achieve the objective: {objective}"
-        plan_response = self._invoke_model([{"role": "user", "content": plan_prompt}])
+        plan_response, plan_cached = self._semantic_invoke("plan", objective, [{"role": "user", "content": plan_prompt}])
 
-        plan_text = plan_response.get("content", "")
-        try:
-            plan = json.loads(plan_text)
-        except json.JSONDecodeError:
-            plan = {"steps": ["Perform the task directly"], "rationale": "Fallback simple plan."}
+        plan = self._parse_plan(plan_response.get("content", ""))
 
-        trace.append({"role": "AI", "stage": "Plan", "content": plan})
-        self.memory.add_short("plan", json.dumps(plan))
-        self._accumulate_usage(usage, plan_response.get("usage", {}))
+        # One slot for the plan, one per step and one for the reflection
+        steps = plan.get("steps", [])
+        trace = [None] * (len(steps) + 2)
+        trace[0] = TraceEntry("AI", stage="Plan", content=plan)
+        self.memory.add_short("plan", _dumps(plan))
+        self._accumulate_usage(usage, plan_response.get("usage", {}), plan_cached)
         usage["steps"] += 1
 
         # 2️⃣ Action stage
-        for step in plan.get("steps", []):
+        action_batch = [[{"role": "user", "content": f"Perform step: {step}"}] for step in steps]
+        if self.max_workers > 1 or (hasattr(self.model, "batch") and not self.stream_response):
+            # Step prompts don't depend on each other, so the model calls are
+            # dispatched together; tools then run serially in plan order.
             if self.stream_response:
-                self.emit_stream_event(stream_callback, "model_thinking", f"Thinking about step: {step}")
-                time.sleep(0.05)
+                for step in steps:
+                    self.emit_stream_event(stream_callback, "model_thinking", f"Thinking about step: {step}")
+            responses = self._invoke_many(action_batch)
+        else:
+            responses = self._invoke_serial(steps, action_batch, stream_callback)
 
-            action_prompt = f"Perform step: {step}"
-            response = self._invoke_model([{"role": "user", "content": action_prompt}])
+        # Bind per-step lookups to locals for the action loop
+        tools = self.tools
+        add_short = self.memory.add_short
+        add_kg = self.kg.add_text
+        emit = self.emit_stream_event
+        accumulate = self._accumulate_usage
+        stream = self.stream_response
+
+        for slot, (response, cached) in enumerate(responses, 1):
             content = response.get("content", "")
 
             if content.startswith("TOOL:"):
-                parts = content.split(":", 2)
-                if len(parts) == 3:
-                    _, tool_name, tool_input = parts
-                    tool = self.tools.get(tool_name)
+                # TOOL:<name>:<input>; the "TOOL:" prefix was already checked
+                tool_name, sep, tool_input = content[5:].partition(":")
+                if sep:
+                    tool = tools.get(tool_name)
                     tool_result = tool(tool_input) if tool else f"[Unknown tool: {tool_name}]"
-                    trace.append({"role": "Tool", "name": tool_name, "response": tool_result})
-                    self.memory.add_short("tool", tool_result)
-                    if self.stream_response:
-                        self.emit_stream_event(stream_callback, "model_content", f"Tool {tool_name} executed.")
+                    trace[slot] = TraceEntry("Tool", name=tool_name, response=tool_result)
+                    add_short("tool", tool_result)
+                    if stream:
+                        emit(stream_callback, "model_content", f"Tool {tool_name} executed.")
             else:
-                trace.append({"role": "AI", "stage": "Act", "content": content})
-                self.memory.add_short("act", content)
-                if self.stream_response:
-                    self.emit_stream_event(stream_callback, "model_content", f"Produced: {content}")
+                trace[slot] = TraceEntry("AI", stage="Act", content=content)
+                add_short("act", content)
+                if stream:
+                    emit(stream_callback, "model_content", f"Produced: {content}")
 
-            self.kg.add_text(content)
-            self._accumulate_usage(usage, response.get("usage", {}))
+            add_kg(content)
+            accumulate(usage, response.get("usage", {}), cached)
             usage["steps"] += 1
 
         # 3️⃣ Reflection stage
         reflect_prompt = f"Reflector: Reflect on how well the agent achieved the objective: {objective}"
-        reflect_response = self._invoke_model([{"role": "user", "content": reflect_prompt}])
+        reflect_response, reflect_cached = self._semantic_invoke("reflect", objective, [{"role": "user", "content": reflect_prompt}])
         reflection = reflect_response.get("content", "")
-        meta_reflection = {"confidence": round(min(1.0, len(reflection) / 100.0), 2)}
-        trace.append({"role": "AI", "stage": "Reflect", "content": reflection, "meta_reflection": meta_reflection})
-        self._accumulate_usage(usage, reflect_response.get("usage", {}))
+        # n / 100 is already the nearest float to the 2-decimal value, so no round() needed
+        n = len(reflection)
+        meta_reflection = {"confidence": (n if n < 100 else 100) / 100}
+        trace[-1] = TraceEntry("AI", stage="Reflect", content=reflection, meta_reflection=meta_reflection)
+        self._accumulate_usage(usage, reflect_response.get("usage", {}), reflect_cached)
         usage["steps"] += 1
 
         # 4️⃣ Final result
@@ -190,13 +653,21 @@ class CognitiveAgent:
 
         return {
             "objective": objective,
-            "trace": trace,
+            "trace": [entry.as_dict() for entry in trace if entry is not None],
             "final_answer": final_answer,
             "usage": usage,
             "knowledge_graph": self.kg.summary(),
         }
 
+    def close(self):
+        """Flushes and closes the long-term memory file, if any."""
+        self.memory.close()
+
     # ---- helper ----
-    def _accumulate_usage(self, usage: Dict, new: Dict):
-        for key in ["prompt_tokens", "completion_tokens", "total_tokens"]:
+    def _accumulate_usage(self, usage: Dict, new: Dict, cached: bool = False):
+        # cached responses cost no tokens; they are only counted as hits
+        if cached:
+            usage["cached_hits"] = usage.get("cached_hits", 0) + 1
+            return
+        for key in _USAGE_KEYS:
             usage[key] = usage.get(key, 0) + new.get(key, 0)
@@ -1,14 +1,23 @@
 # tests/test_agent.py
+import asyncio
 import unittest
 import json
 import tempfile
 import os
+import subprocess
 import sys
+import threading
+import time
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from cognitive_agent.agent import CognitiveAgent
+from cognitive_agent.agent import CognitiveAgent, SemanticCache, pure_tool
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 # ------------------------
@@ -57,6 +66,27 @@ class DummyModel:
         return {"content": "FINAL: Task complete", "usage": {"prompt_tokens": 5, "completion_tokens": 5, "total_tokens": 10}}
 
 
+class CountingModel(DummyModel):
+    """DummyModel that records how many times it was invoked."""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, messages):
+        self.calls += 1
+        return super().__call__(messages)
+
+
+class BatchModel(CountingModel):
+    """DummyModel that also exposes a batch() API."""
+    def __init__(self):
+        super().__init__()
+        self.batch_calls = 0
+
+    def batch(self, batch):
+        self.batch_calls += 1
+        return [super(BatchModel, self).__call__(messages) for messages in batch]
+
+
 # ------------------------
 # Simple Tool
 # ------------------------
@@ -78,6 +108,7 @@ class TestCognitiveAgent(unittest.TestCase):
         )
 
     def tearDown(self):
+        self.agent.close()
         if hasattr(self, 'tempfile') and self.tempfile:
             self.tempfile.close()
         if hasattr(self, 'tempfile') and os.path.exists(self.tempfile.name):
@@ -102,11 +133,58 @@ class TestCognitiveAgent(unittest.TestCase):
         self.assertEqual(recall[-1]["text"], "Previous run summary")
         print("\n✅ test_memory_persistence passed.")
 
+    def test_memory_file_flush(self):
+        memory = self.agent.memory
+        for i in range(3):
+            memory.persist_long(f"entry {i}")
+        self.assertEqual(os.path.getsize(self.tempfile.name), 0)  # still buffered
+        memory.flush()
+        with open(self.tempfile.name, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([e["text"] for e in lines], ["entry 0", "entry 1", "entry 2"])
+        self.agent.close()
+        print("\n✅ test_memory_file_flush passed.")
+
+    def test_memory_flushed_at_exit(self):
+        # A reference cycle keeps the memory alive until interpreter shutdown
+        script = (
+            "import sys; sys.path.insert(0, sys.argv[1])\n"
+            "from cognitive_agent.agent import Memory\n"
+            "memory = Memory(sys.argv[2])\n"
+            "memory.self_ref = memory\n"
+            "memory.persist_long('kept at exit')\n"
+        )
+        src_dir = os.path.join(os.path.dirname(__file__), '..')
+        subprocess.run([sys.executable, "-c", script, src_dir, self.tempfile.name], check=True)
+        with open(self.tempfile.name, encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["text"], "kept at exit")
+        print("\n✅ test_memory_flushed_at_exit passed.")
+
+    def test_agent_memory_write_through(self):
+        agent = CognitiveAgent(model=DummyModel(), memory_store_path=self.tempfile.name, memory_buffer_limit=0)
+        agent.memory.persist_long("written immediately")
+        self.assertGreater(os.path.getsize(self.tempfile.name), 0)
+        agent.close()
+        print("\n✅ test_agent_memory_write_through passed.")
+
+    def test_short_term_is_bounded(self):
+        memory = self.agent.memory
+        for i in range(100):
+            memory.add_short("act", f"message {i}")
+        self.assertEqual(len(memory.short_term), 64)
+        self.assertEqual([m["content"] for m in memory.get_context()], [f"message {i}" for i in range(95, 100)])
+        print("\n✅ test_short_term_is_bounded passed.")
+
     def test_knowledge_graph_building(self):
         self.agent.kg.add_text("AI uses Data and improves Performance.")
         summary = self.agent.kg.summary()
         self.assertIn("AI", summary["nodes"])
         self.assertTrue(any("uses" in rel for _, rel, _ in summary["edges"]))
+        self.agent.kg.add_text("AI improves Data.")
+        self.assertEqual(self.agent.kg.nodes["Data"], 2)
+        # Unicode words are matched as whole words
+        self.agent.kg.add_text("AI naïve Data.")
+        self.assertIn(("AI", "naïve", "Data"), self.agent.kg.summary()["edges"])
         print("\n✅ test_knowledge_graph_building passed.")
 
     def test_streaming_callback(self):
@@ -120,6 +198,15 @@ class TestCognitiveAgent(unittest.TestCase):
         self.assertTrue(any(t in event_types for t in ["model_thinking", "model_content"]))
         print("\n✅ test_streaming_callback passed.")
 
+    def test_serial_event_order(self):
+        events = []
+        self.agent.run("Event order test", stream_callback=events.append)
+        self.assertEqual(
+            [e["type"] for e in events],
+            ["model_thinking", "model_content"] * 3,
+        )
+        print("\n✅ test_serial_event_order passed.")
+
     def test_confidence_and_reflection(self):
         result = self.agent.run("Analyze confidence test")
         reflect_stage = [t for t in result["trace"] if t.get("stage") == "Reflect"]
@@ -128,6 +215,179 @@ class TestCognitiveAgent(unittest.TestCase):
         self.assertIn("confidence", meta)
         print("\n✅ test_confidence_and_reflection passed.")
 
+    def test_response_cache(self):
+        model = CountingModel()
+        agent = CognitiveAgent(model=model, tools=[echo_tool])
+        first = agent.run("Cache test")
+        calls_after_first = model.calls
+        second = agent.run("Cache test")
+        self.assertEqual(model.calls, calls_after_first)
+        self.assertEqual(first["final_answer"], second["final_answer"])
+        self.assertGreater(first["usage"]["total_tokens"], 0)
+        self.assertEqual(second["usage"]["total_tokens"], 0)
+        self.assertEqual(second["usage"]["cached_hits"], 5)
+
+        # Streaming bypasses the cache
+        streaming = CognitiveAgent(model=model, tools=[echo_tool], stream_response=True)
+        streaming.run("Cache test")
+        self.assertGreater(model.calls, calls_after_first)
+        print("\n✅ test_response_cache passed.")
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_semantic_cache(self):
+        def embed(text):
+            return [1.0, 0.1] if "reasoning" in text.lower() else [0.1, 1.0]
+
+        model = CountingModel()
+        agent = CognitiveAgent(model=model, tools=[echo_tool], embed_fn=embed)
+        agent.run("Test simple reasoning task")
+        calls_after_first = model.calls
+        second = agent.run("Run simple reasoning test")
+        self.assertEqual(model.calls, calls_after_first)
+        self.assertEqual(second["usage"]["total_tokens"], 0)
+        agent.run("Unrelated objective")
+        self.assertGreater(model.calls, calls_after_first)
+        print("\n✅ test_semantic_cache passed.")
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_semantic_cache_dimension_mismatch(self):
+        dims = {"stored": 8, "query": 4}
+        cache = SemanticCache(lambda text: [1.0] * dims[text])
+        cache.add("stored", {"content": "cached"})
+        self.assertIsNone(cache.lookup("query"))
+        self.assertEqual(cache.lookup("stored"), {"content": "cached"})
+        print("\n✅ test_semantic_cache_dimension_mismatch passed.")
+
+    def test_parallel_steps_keep_order(self):
+        class SlowModel:
+            """Earlier steps take longer, so out-of-order completion is likely."""
+            def __call__(self, messages):
+                last = messages[-1]["content"]
+                if "Planner" in last:
+                    return {"content": json.dumps({"steps": ["step 1", "step 2", "step 3", "step 4"]})}
+                if "Perform step" in last:
+                    index = int(last[-1])
+                    time.sleep(0.02 * (5 - index))
+                    return {"content": f"Result {index}"}
+                return {"content": "FINAL: done"}
+
+        agent = CognitiveAgent(model=SlowModel(), max_workers=4)
+        result = agent.run("Parallel test")
+        acts = [t["content"] for t in result["trace"] if t.get("stage") == "Act"]
+        self.assertEqual(acts, ["Result 1", "Result 2", "Result 3", "Result 4"])
+        print("\n✅ test_parallel_steps_keep_order passed.")
+
+    def test_batch_dispatch(self):
+        model = BatchModel()
+        agent = CognitiveAgent(model=model, tools=[echo_tool])
+        result = agent.run("Batch test")
+        self.assertEqual(model.batch_calls, 1)
+        self.assertEqual(model.calls, 5)  # plan + reflect + 3 steps in one batch
+        self.assertTrue(any(t.get("role") == "Tool" for t in result["trace"]))
+
+        # Cached steps are not re-sent
+        agent.run("Batch test")
+        self.assertEqual(model.batch_calls, 1)
+        print("\n✅ test_batch_dispatch passed.")
+
+    def test_batch_result_count_checked(self):
+        class ShortBatchModel(BatchModel):
+            def batch(self, batch):
+                return super().batch(batch)[:-1]
+
+        for cache_size in (1024, 0):
+            agent = CognitiveAgent(model=ShortBatchModel(), tools=[echo_tool], cache_size=cache_size)
+            with self.assertRaises(ValueError):
+                agent.run("Short batch test")
+
+        # An empty plan never reaches model.batch()
+        class EmptyPlanModel(BatchModel):
+            def __call__(self, messages):
+                if "Planner" in messages[-1]["content"]:
+                    return {"content": json.dumps({"steps": []})}
+                return super().__call__(messages)
+
+        model = EmptyPlanModel()
+        CognitiveAgent(model=model, cache_size=0).run("Empty plan test")
+        self.assertEqual(model.batch_calls, 0)
+        print("\n✅ test_batch_result_count_checked passed.")
+
+    def test_pure_tool_is_memoized(self):
+        calls = []
+
+        @pure_tool
+        def echo_tool(text: str) -> str:
+            calls.append(text)
+            return f"ECHO: {text}"
+
+        agent = CognitiveAgent(model=DummyModel(), tools=[echo_tool], stream_response=True)
+        agent.run("First run")
+        agent.run("Second run")
+        self.assertEqual(len(calls), 1)
+        print("\n✅ test_pure_tool_is_memoized passed.")
+
+    def test_fallback_plan(self):
+        class ProseModel:
+            def __call__(self, messages):
+                if "Planner" in messages[-1]["content"]:
+                    return {"content": "Sure! First, gather data. Then summarize."}
+                return {"content": "FINAL: done"}
+
+        for agent in (CognitiveAgent(model=ProseModel()), CognitiveAgent(model=lambda m: {"content": "[1, 2]"})):
+            plan = agent.run("Fallback test")["trace"][0]["content"]
+            self.assertEqual(plan["steps"], ["Perform the task directly"])
+        print("\n✅ test_fallback_plan passed.")
+
+    def test_async_events(self):
+        async def collect():
+            return [event async for event in self.agent.events("Async streaming test")]
+
+        events = asyncio.run(collect())
+        self.assertEqual(events[0]["type"], "model_thinking")
+        self.assertEqual(events[-1]["type"], "result")
+        self.assertIn("agent", events[-1]["data"]["final_answer"].lower())
+        print("\n✅ test_async_events passed.")
+
+    def test_concurrent_async_events_are_isolated(self):
+        async def collect(objective):
+            return [event["type"] async for event in self.agent.events(objective)]
+
+        async def both():
+            return await asyncio.gather(collect("First stream"), collect("Second stream"))
+
+        expected = ["model_thinking", "model_content"] * 3 + ["result"]
+        for types in asyncio.run(both()):
+            self.assertEqual(types, expected)
+        print("\n✅ test_concurrent_async_events_are_isolated passed.")
+
+    def test_shared_state_under_concurrent_runs(self):
+        def run_many(target, count):
+            threads = [threading.Thread(target=lambda: [target() for _ in range(count)]) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        kg = self.agent.kg
+        run_many(lambda: kg.add_text("AI uses Data."), 500)
+        self.assertEqual(kg.nodes["Data"], 8 * 500)
+        self.assertEqual(len(kg.summary()["edges"]), 8 * 500)
+
+        if numpy is not None:
+            cache = SemanticCache(lambda text: [1.0, float(len(text))])
+            errors = []
+
+            def add_and_lookup():
+                try:
+                    cache.add("key text", {"content": "cached"})
+                    self.assertEqual(cache.lookup("key text"), {"content": "cached"})
+                except Exception as e:  # collected so worker failures reach the test
+                    errors.append(e)
+
+            run_many(add_and_lookup, 100)
+            self.assertEqual(errors, [])
+        print("\n✅ test_shared_state_under_concurrent_runs passed.")
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)